@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark for label QR encoding: the reference qrcode path (version search and
+all eight masks per label) against the fast path (fixed version and mask per payload
+shape, cached template modules, direct 1-bit rendering).
+
+Usage: python benchmark_qr.py [labels]
+"""
+
+import sys
+import time
+import uuid
+
+import numpy as np
+import qrcode
+
+from app import LabelGenerator, QrEncoderCache, app
+
+
+def trace_urls(count):
+    return [f'http://localhost:5000/product/{uuid.uuid4()}' for _ in range(count)]
+
+
+def time_per_label(fn, urls):
+    start = time.perf_counter()
+    for url in urls:
+        fn(url)
+    return (time.perf_counter() - start) / len(urls)
+
+
+def reference_modules(url):
+    qr = qrcode.QRCode(version=1, error_correction=qrcode.constants.ERROR_CORRECT_L, border=4)
+    qr.add_data(url)
+    qr.make(fit=True)
+    return qr.modules
+
+
+def check_fast_path(encoders, urls):
+    """The fast path must produce the symbol qrcode builds with the same version and mask"""
+    for url in urls:
+        data_list = list(qrcode.util.optimal_data_chunks(url, minimum=encoders.optimize))
+        encoder = encoders._encoders[tuple((chunk.mode, len(chunk)) for chunk in data_list)]
+        qr = qrcode.QRCode(
+            version=encoder.version,
+            error_correction=encoder.error_correction,
+            mask_pattern=encoder.mask_pattern
+        )
+        qr.add_data(url)
+        qr.make(fit=False)
+        if not np.array_equal(encoders.encode(url), np.array(qr.modules)):
+            raise SystemExit(f'Fast path disagrees with qrcode for {url}')
+
+
+def main():
+    labels = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    urls = trace_urls(labels)
+    encoders = QrEncoderCache()
+    encoders.encode(urls[0])  # Build the encoder for the trace URL shape up front
+
+    results = []
+    results.append(('modules', time_per_label(reference_modules, urls), time_per_label(encoders.encode, urls)))
+
+    with app.app_context():
+        app.config['QR_ENCODER'] = 'reference'
+        reference_image = time_per_label(LabelGenerator.generate_qr_code, urls)
+        app.config['QR_ENCODER'] = 'fast'
+        fast_image = time_per_label(LabelGenerator.generate_qr_code, urls)
+    results.append(('1-bit image', reference_image, fast_image))
+
+    check_fast_path(encoders, urls)
+
+    print(f'QR encoding, {labels} trace URLs')
+    print(f"{'stage':<12} {'reference':>12} {'fast':>12} {'speedup':>9}")
+    for stage, reference, fast in results:
+        print(f'{stage:<12} {reference * 1e6:>9.0f} us {fast * 1e6:>9.0f} us {reference / fast:>8.1f}x')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,44 @@
+"""Add workflow_job table for persistent workflow runs
+
+Revision ID: 3b7e9a1c5d20
+Revises: d45d019d51cf
+Create Date: 2026-10-17 10:12:31.418205
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3b7e9a1c5d20'
+down_revision = 'd45d019d51cf'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('workflow_job',
+        sa.Column('id', sa.String(length=36), nullable=False),
+        sa.Column('product_id', sa.String(length=36), nullable=False),
+        sa.Column('state', sa.String(length=20), nullable=False),
+        sa.Column('attempts', sa.Integer(), nullable=False),
+        sa.Column('max_attempts', sa.Integer(), nullable=False),
+        sa.Column('lease_owner', sa.String(length=100), nullable=True),
+        sa.Column('lease_expires_at', sa.DateTime(), nullable=True),
+        sa.Column('last_completed_stage', sa.String(length=50), nullable=True),
+        sa.Column('success', sa.Boolean(), nullable=True),
+        sa.Column('error', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['product_id'], ['product.id'], ),
+        sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('workflow_job', schema=None) as batch_op:
+        batch_op.create_index('ix_workflow_job_state_lease', ['state', 'lease_expires_at'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('workflow_job', schema=None) as batch_op:
+        batch_op.drop_index('ix_workflow_job_state_lease')
+
+    op.drop_table('workflow_job')
@@ -0,0 +1,82 @@
+"""Add numeric quality_check values and backfill them from the raw strings
+
+Revision ID: 5a1d7c3e9b42
+Revises: 8f2c4d6e1a37
+Create Date: 2026-10-17 15:12:44.318270
+
+"""
+import math
+import re
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5a1d7c3e9b42'
+down_revision = '8f2c4d6e1a37'
+branch_labels = None
+depends_on = None
+
+# Same pattern as app.MEASUREMENT_PATTERN, copied so the migration does not import the app
+MEASUREMENT_PATTERN = re.compile(r'^\s*([-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?)\s*([^\d\s.+-].*)?$')
+BACKFILL_CHUNK = 1000
+
+
+def parse_number(value):
+    match = MEASUREMENT_PATTERN.match(value) if value is not None else None
+    if not match:
+        return None
+    number = float(match.group(1))
+    return number if math.isfinite(number) else None
+
+
+def upgrade():
+    with op.batch_alter_table('quality_check', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('expected_numeric', sa.Float(), nullable=True))
+        batch_op.add_column(sa.Column('actual_numeric', sa.Float(), nullable=True))
+        batch_op.add_column(sa.Column('min_value', sa.Float(), nullable=True))
+        batch_op.add_column(sa.Column('max_value', sa.Float(), nullable=True))
+        batch_op.create_index('ix_quality_check_parameter', ['parameter_name', 'checked_at'], unique=False)
+
+    conn = op.get_bind()
+    quality_check = sa.table(
+        'quality_check',
+        sa.column('id', sa.String),
+        sa.column('expected_value', sa.String),
+        sa.column('actual_value', sa.String),
+        sa.column('expected_numeric', sa.Float),
+        sa.column('actual_numeric', sa.Float)
+    )
+    statement = quality_check.update().where(quality_check.c.id == sa.bindparam('check_id')).values(
+        expected_numeric=sa.bindparam('expected'),
+        actual_numeric=sa.bindparam('actual')
+    )
+    # Walk the table in id order one chunk at a time so memory stays flat on large tables
+    last_id = ''
+    while True:
+        rows = conn.execute(
+            sa.select(quality_check.c.id, quality_check.c.expected_value, quality_check.c.actual_value)
+            .where(quality_check.c.id > last_id)
+            .order_by(quality_check.c.id)
+            .limit(BACKFILL_CHUNK)
+        ).fetchall()
+        if not rows:
+            break
+        last_id = rows[-1].id
+        updates = [
+            {'check_id': row.id, 'expected': parse_number(row.expected_value), 'actual': parse_number(row.actual_value)}
+            for row in rows
+        ]
+        updates = [u for u in updates if u['expected'] is not None or u['actual'] is not None]
+        if updates:
+            conn.execute(statement, updates)
+
+
+def downgrade():
+    with op.batch_alter_table('quality_check', schema=None) as batch_op:
+        batch_op.drop_index('ix_quality_check_parameter')
+        batch_op.drop_column('max_value')
+        batch_op.drop_column('min_value')
+        batch_op.drop_column('actual_numeric')
+        batch_op.drop_column('expected_numeric')
@@ -0,0 +1,53 @@
+"""Add label image_size and has_image so listings need not load images
+
+Revision ID: 7d2f8b4c0e15
+Revises: e3b9f15a7c64
+Create Date: 2026-10-17 18:52:10.227481
+
+"""
+import os
+
+from alembic import op
+from flask import current_app
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7d2f8b4c0e15'
+down_revision = 'e3b9f15a7c64'
+branch_labels = None
+depends_on = None
+
+label = sa.table(
+    'label',
+    sa.column('id', sa.String),
+    sa.column('image_hash', sa.String),
+    sa.column('image_size', sa.Integer)
+)
+
+
+def upgrade():
+    with op.batch_alter_table('label', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('has_image', sa.Boolean(), nullable=False, server_default=sa.false()))
+        batch_op.add_column(sa.Column('image_size', sa.Integer(), nullable=True))
+
+    # Legacy inline images
+    op.execute(
+        "UPDATE label SET has_image = (label_image IS NOT NULL), image_size = LENGTH(label_image) "
+        "WHERE label_image IS NOT NULL"
+    )
+    # Images in the blob store; the size comes from the file
+    op.execute("UPDATE label SET has_image = (image_hash IS NOT NULL) WHERE image_hash IS NOT NULL")
+    conn = op.get_bind()
+    rows = conn.execute(sa.select(label.c.id, label.c.image_hash).where(label.c.image_hash.isnot(None))).fetchall()
+    blob_dir = current_app.config['LABEL_BLOB_DIR']
+    for row in rows:
+        path = os.path.join(blob_dir, row.image_hash[:2], f'{row.image_hash}.png')
+        if os.path.exists(path):
+            conn.execute(label.update().where(label.c.id == row.id).values(image_size=os.path.getsize(path)))
+
+
+def downgrade():
+    with op.batch_alter_table('label', schema=None) as batch_op:
+        batch_op.drop_column('image_size')
+        batch_op.drop_column('has_image')
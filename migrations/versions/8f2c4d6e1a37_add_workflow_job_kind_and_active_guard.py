@@ -0,0 +1,34 @@
+"""Add workflow_job kind and one-active-job-per-product guard
+
+Revision ID: 8f2c4d6e1a37
+Revises: 3b7e9a1c5d20
+Create Date: 2026-10-17 11:40:07.902114
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8f2c4d6e1a37'
+down_revision = '3b7e9a1c5d20'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('workflow_job', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('kind', sa.String(length=30), nullable=False, server_default='complete_workflow'))
+        batch_op.create_index(
+            'uq_workflow_job_active',
+            ['product_id', 'kind'],
+            unique=True,
+            sqlite_where=sa.text("state IN ('queued', 'running')"),
+            postgresql_where=sa.text("state IN ('queued', 'running')")
+        )
+
+
+def downgrade():
+    with op.batch_alter_table('workflow_job', schema=None) as batch_op:
+        batch_op.drop_index('uq_workflow_job_active')
+        batch_op.drop_column('kind')
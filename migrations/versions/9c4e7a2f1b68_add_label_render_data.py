@@ -0,0 +1,27 @@
+"""Add label render_data, the fields and template a label was rendered from
+
+Revision ID: 9c4e7a2f1b68
+Revises: 7d2f8b4c0e15
+Create Date: 2026-10-17 22:14:37.608213
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9c4e7a2f1b68'
+down_revision = '7d2f8b4c0e15'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Existing labels keep NULL: the fields they were rendered from were never stored
+    with op.batch_alter_table('label', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('render_data', sa.Text(), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('label', schema=None) as batch_op:
+        batch_op.drop_column('render_data')
@@ -0,0 +1,41 @@
+"""Add per-product quality check counters and backfill them
+
+Revision ID: c6e4a2b8d913
+Revises: 5a1d7c3e9b42
+Create Date: 2026-10-17 16:48:21.530914
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c6e4a2b8d913'
+down_revision = '5a1d7c3e9b42'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('product', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('checks_total', sa.Integer(), nullable=False, server_default='0'))
+        batch_op.add_column(sa.Column('checks_passed', sa.Integer(), nullable=False, server_default='0'))
+        batch_op.add_column(sa.Column('checks_failed', sa.Integer(), nullable=False, server_default='0'))
+        batch_op.add_column(sa.Column('checks_pending', sa.Integer(), nullable=False, server_default='0'))
+
+    op.execute("""
+        UPDATE product SET
+            checks_total = (SELECT COUNT(*) FROM quality_check q WHERE q.product_id = product.id),
+            checks_passed = (SELECT COUNT(*) FROM quality_check q WHERE q.product_id = product.id AND q.status = 'passed'),
+            checks_failed = (SELECT COUNT(*) FROM quality_check q WHERE q.product_id = product.id AND q.status = 'failed'),
+            checks_pending = (SELECT COUNT(*) FROM quality_check q WHERE q.product_id = product.id
+                              AND (q.status IS NULL OR q.status NOT IN ('passed', 'failed')))
+    """)
+
+
+def downgrade():
+    with op.batch_alter_table('product', schema=None) as batch_op:
+        batch_op.drop_column('checks_pending')
+        batch_op.drop_column('checks_failed')
+        batch_op.drop_column('checks_passed')
+        batch_op.drop_column('checks_total')
@@ -0,0 +1,88 @@
+"""Move label images out of the label table into the blob store
+
+Revision ID: e3b9f15a7c64
+Revises: c6e4a2b8d913
+Create Date: 2026-10-17 18:05:37.640192
+
+"""
+import hashlib
+import logging
+import os
+import uuid
+
+from alembic import op
+from flask import current_app
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e3b9f15a7c64'
+down_revision = 'c6e4a2b8d913'
+branch_labels = None
+depends_on = None
+
+logger = logging.getLogger('alembic.env')
+
+MOVE_CHUNK = 100
+
+label = sa.table(
+    'label',
+    sa.column('id', sa.String),
+    sa.column('label_image', sa.LargeBinary),
+    sa.column('image_hash', sa.String)
+)
+
+
+def blob_path(image_hash):
+    # Same layout as app.LabelBlobStore, which the migration does not import
+    return os.path.join(current_app.config['LABEL_BLOB_DIR'], image_hash[:2], f'{image_hash}.png')
+
+
+def write_blob(data):
+    image_hash = hashlib.sha256(data).hexdigest()
+    path = blob_path(image_hash)
+    if not os.path.exists(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f'{path}.{uuid.uuid4().hex}.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    return image_hash
+
+
+def upgrade():
+    with op.batch_alter_table('label', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('image_hash', sa.String(length=64), nullable=True))
+        batch_op.create_index(batch_op.f('ix_label_image_hash'), ['image_hash'], unique=False)
+
+    conn = op.get_bind()
+    ids = [row.id for row in conn.execute(sa.select(label.c.id).where(label.c.label_image.isnot(None)))]
+    for i in range(0, len(ids), MOVE_CHUNK):
+        rows = conn.execute(sa.select(label.c.id, label.c.label_image).where(label.c.id.in_(ids[i:i + MOVE_CHUNK])))
+        for row in rows.fetchall():
+            conn.execute(label.update().where(label.c.id == row.id).values(
+                image_hash=write_blob(row.label_image),
+                label_image=None
+            ))
+
+
+def downgrade():
+    conn = op.get_bind()
+    rows = conn.execute(sa.select(label.c.id, label.c.image_hash).where(label.c.image_hash.isnot(None))).fetchall()
+    missing = 0
+    for row in rows:
+        try:
+            with open(blob_path(row.image_hash), 'rb') as f:
+                data = f.read()
+        except FileNotFoundError:
+            # Swept or lost: the label comes back without an image rather than failing the downgrade
+            logger.warning(f'Label {row.id}: blob {row.image_hash} is missing, leaving label_image empty')
+            missing += 1
+            continue
+        conn.execute(label.update().where(label.c.id == row.id).values(label_image=data))
+    if missing:
+        logger.warning(f'{missing} labels had no blob to restore')
+
+    with op.batch_alter_table('label', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_label_image_hash'))
+        batch_op.drop_column('image_hash')
@@ -27,7 +27,7 @@ function Labels({ productId, labels, refresh, product }) {
       for (const label of labels) {
         if (label.has_image) {
           try {
-            urls[label.id] = `${process.env.REACT_APP_API_BASE || 'http://localhost:5000/api'}/labels/${label.id}/image?${Date.now()}`;
+            urls[label.id] = `${process.env.REACT_APP_API_BASE || 'http://localhost:5000/api'}/labels/${label.id}/image`;
           } catch {}
         }
       }
@@ -177,7 +177,7 @@ function Labels({ productId, labels, refresh, product }) {
                 {label.has_image && imgUrls[label.id] && (
                   <div id={`print-area-${label.id}`} style={{ textAlign: 'center', marginBottom: 8 }}>
                     <img
-                      src={imgUrls[label.id]}
+                      src={`${imgUrls[label.id]}?size=screen`}
                       alt="QR Code"
                       style={{ maxWidth: '100%', maxHeight: 180, border: '1px solid #eee', borderRadius: 8 }}
                     />
@@ -0,0 +1,38 @@
+import os
+import sys
+import tempfile
+
+import pytest
+
+# app reads its configuration at import, so point it at a scratch database and blob store first
+TEST_DIR = tempfile.mkdtemp(prefix='smart-label-tests-')
+os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(TEST_DIR, 'test.db')}"
+os.environ['LABEL_BLOB_DIR'] = os.path.join(TEST_DIR, 'label_blobs')
+os.environ['HARDWARE_SIM_PROFILE'] = 'zero'
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app as smart_label  # noqa: E402
+
+
+@pytest.fixture
+def app():
+    with smart_label.app.app_context():
+        smart_label.db.create_all()
+        yield smart_label.app
+        # Buffered log rows must land before their tables are dropped
+        smart_label.workflow_log_sink.flush()
+        smart_label.db.session.remove()
+        smart_label.db.drop_all()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def product(app):
+    product = smart_label.Product(name='Green Tea', batch_number='B-1001', manufacturer='Acme')
+    smart_label.db.session.add(product)
+    smart_label.db.session.commit()
+    return product
@@ -0,0 +1,42 @@
+import io
+
+import pytest
+from PIL import Image
+
+import app as smart_label
+
+
+def create_label(client, product, label_type='qr_code'):
+    response = client.post(f'/api/products/{product.id}/labels', json={'label_type': label_type, 'auto_generate': True})
+    assert response.status_code == 201
+    return response.get_json()['label']['id']
+
+
+@pytest.mark.parametrize('label_type', ['qr_code', 'barcode'])
+def test_variants_are_smaller_than_the_full_image(client, product, label_type):
+    label_id = create_label(client, product, label_type)
+    full = client.get(f'/api/labels/{label_id}/image').data
+
+    for size in ('thumb', 'screen'):
+        variant = client.get(f'/api/labels/{label_id}/image?size={size}').data
+        assert len(variant) < len(full), size
+    assert len(client.get(f'/api/labels/{label_id}/image?size=print&dpi=203').data) < len(full)
+
+
+def test_variants_are_rendered_in_the_template_mode(client, product):
+    label_id = create_label(client, product)
+    full = Image.open(io.BytesIO(client.get(f'/api/labels/{label_id}/image').data))
+    screen = Image.open(io.BytesIO(client.get(f'/api/labels/{label_id}/image?size=screen').data))
+
+    assert screen.mode == full.mode == '1'
+    assert screen.width == pytest.approx(full.width / 2, abs=10)
+
+
+def test_variants_keep_the_content_the_label_was_rendered_with(client, product):
+    label_id = create_label(client, product)
+    before = client.get(f'/api/labels/{label_id}/image?size=print&dpi=600').data
+
+    client.put(f'/api/products/{product.id}', json={'name': 'Black Tea', 'batch_number': 'B-2002'})
+    smart_label.label_variant_cache.clear()
+
+    assert client.get(f'/api/labels/{label_id}/image?size=print&dpi=600').data == before
@@ -0,0 +1,58 @@
+import time
+
+import pytest
+
+import app as smart_label
+
+
+def test_raising_job_fails_after_its_attempts(app, product, monkeypatch):
+    def explode(*args, **kwargs):
+        raise RuntimeError('sensor bus on fire')
+
+    monkeypatch.setattr(smart_label.WorkflowAutomation, 'run_complete_workflow', explode)
+    store = smart_label.workflow_job_store
+
+    started = time.monotonic()
+    result = store.submit_and_wait(product.id)
+
+    assert time.monotonic() - started < store.coalesce_wait
+    assert result['state'] == 'failed'
+    assert result['error'] == 'sensor bus on fire'
+    workflow_job = smart_label.db.session.get(smart_label.WorkflowJob, result['workflow_job_id'])
+    assert workflow_job.attempts == workflow_job.max_attempts
+    assert workflow_job.lease_owner is None
+    smart_label.db.session.refresh(product)
+    assert product.workflow_status == 'failed'
+
+
+def test_wait_does_not_run_a_queued_job(app, product, monkeypatch):
+    calls = []
+    monkeypatch.setattr(smart_label.WorkflowAutomation, 'run_complete_workflow', lambda *args, **kwargs: calls.append(args))
+    store = smart_label.workflow_job_store
+    workflow_job, created = store.create(product.id)
+
+    result = store.wait(workflow_job.id, timeout=0.3)
+
+    assert created
+    assert result['pending']
+    assert calls == []
+    smart_label.db.session.refresh(workflow_job)
+    assert (workflow_job.state, workflow_job.attempts) == ('queued', 0)
+
+
+@pytest.mark.parametrize('mode', ['single', 'stage'])
+def test_store_jobs_use_the_configured_commit_mode(app, product, monkeypatch, mode):
+    modes = []
+    unit_of_work = smart_label.WorkflowUnitOfWork
+
+    def recording_unit_of_work(mode='single', checkpoint=None):
+        modes.append(mode)
+        return unit_of_work(mode, checkpoint=checkpoint)
+
+    monkeypatch.setitem(app.config, 'WORKFLOW_COMMIT_MODE', mode)
+    monkeypatch.setattr(smart_label, 'WorkflowUnitOfWork', recording_unit_of_work)
+
+    result = smart_label.workflow_job_store.submit_and_wait(product.id)
+
+    assert result['state'] == 'completed'
+    assert modes == [mode]
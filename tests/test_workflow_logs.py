@@ -0,0 +1,18 @@
+import app as smart_label
+
+
+def test_reads_include_buffered_entries_once(client, product):
+    sink = smart_label.workflow_log_sink
+    sink.write(product.id, 'auto_label_generation', 'success', 'stored')
+    sink.flush()
+    sink.write(product.id, 'auto_label_generation', 'in_progress', 'buffered')
+
+    logs = client.get(f'/api/products/{product.id}/workflow/logs').get_json()['workflow_logs']
+    assert [log['details'] for log in logs] == ['stored', 'buffered']
+    assert client.get(f'/api/products/{product.id}').get_json()['workflow_logs'] == logs
+
+    page = client.get('/api/workflow/logs?per_page=1').get_json()
+    assert [log['details'] for log in page['workflow_logs']] == ['buffered']
+    assert (page['total'], page['pages']) == (2, 2)
+    second = client.get('/api/workflow/logs?per_page=1&page=2').get_json()
+    assert [log['details'] for log in second['workflow_logs']] == ['stored']